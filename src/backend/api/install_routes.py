@@ -1,10 +1,11 @@
 import logging
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import Dict
+from fastapi import APIRouter, HTTPException
+from typing import Dict, List, Optional
 import os
-import asyncio
 from ..services.klipper_installer import KlipperInstaller
-from ..core.schemas import InstallationResponse
+from ..services.job_manager import job_manager, JobStep
+from ..services.provisioning_scheduler import ProvisioningScheduler
+from ..core.schemas import InstallJobResponse, InstallJobStep, ProvisionRequest
 
 # Logging konfigurieren
 logging.basicConfig(level=logging.DEBUG)
@@ -12,91 +13,125 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 installer = KlipperInstaller()
+scheduler = ProvisioningScheduler(installer)
 
-@router.post("/install/{printer_id}", response_model=InstallationResponse)
-async def install_klipper(printer_id: str, background_tasks: BackgroundTasks) -> Dict[str, str]:
-    """Startet die Klipper-Installation für einen bestimmten Drucker"""
-    try:
-        # Prüfe Root-Rechte
-        if os.getuid() != 0:
-            raise HTTPException(
-                status_code=403,
-                detail="Die Installation muss mit Root-Rechten ausgeführt werden"
-            )
-
-        logger.debug("Starte Klipper-Installation...")
-
-        # Klipper installieren
-        logger.debug("Installiere Klipper...")
-        result = await installer.install_klipper()
-        if result["status"] == "error":
-            logger.error(f"Klipper-Installation fehlgeschlagen: {result['message']}")
-            raise HTTPException(status_code=500, detail=result["message"])
-        logger.debug("Klipper erfolgreich installiert")
-
-        # Firmware kompilieren
-        logger.debug("Kompiliere Firmware...")
-        result = await installer.compile_firmware()
-        if result["status"] == "error":
-            logger.error(f"Firmware-Kompilierung fehlgeschlagen: {result['message']}")
-            raise HTTPException(status_code=500, detail=result["message"])
-        logger.debug("Firmware erfolgreich kompiliert")
-
-        # Firmware flashen
-        logger.debug("Flashe Firmware...")
-        result = await installer.flash_firmware("/dev/ttyUSB0")
-        if result["status"] == "error":
-            logger.error(f"Firmware-Flash fehlgeschlagen: {result['message']}")
-            raise HTTPException(status_code=500, detail=result["message"])
-        logger.debug("Firmware erfolgreich geflasht")
-
-        # Klipper-Service einrichten
-        logger.debug("Richte Klipper-Service ein...")
-        result = await installer.setup_klipper_service()
-        if result["status"] == "error":
-            logger.error(f"Service-Einrichtung fehlgeschlagen: {result['message']}")
-            raise HTTPException(status_code=500, detail=result["message"])
-        logger.debug("Klipper-Service erfolgreich eingerichtet")
-
-        # Drucker-Konfiguration erstellen
-        logger.debug("Erstelle Drucker-Konfiguration...")
-        config_data = {
-            "serial_port": "/dev/ttyUSB0",
-            "kinematics": "cartesian",
-            "max_velocity": "300",
-            "max_accel": "3000",
-            "max_z_velocity": "5",
-            "max_z_accel": "100",
-            # Standard-Pins für RAMPS 1.4
-            "x_step_pin": "ar54",
-            "x_dir_pin": "ar55",
-            "x_enable_pin": "ar38",
-            "x_endstop_pin": "ar3",
-            "y_step_pin": "ar60",
-            "y_dir_pin": "ar61",
-            "y_enable_pin": "ar56",
-            "y_endstop_pin": "ar14",
-            "z_step_pin": "ar46",
-            "z_dir_pin": "ar48",
-            "z_enable_pin": "ar62",
-            "z_endstop_pin": "ar18",
-            "e_step_pin": "ar26",
-            "e_dir_pin": "ar28",
-            "e_enable_pin": "ar24",
-            "heater_pin": "ar10",
-            "fan_pin": "ar9",
-            "temp_pin": "analog1"
-        }
-        
-        result = await installer.create_printer_config(config_data)
-        if result["status"] == "error":
-            logger.error(f"Konfigurationserstellung fehlgeschlagen: {result['message']}")
-            raise HTTPException(status_code=500, detail=result["message"])
-        logger.debug("Drucker-Konfiguration erfolgreich erstellt")
-
-        logger.debug("Installation erfolgreich abgeschlossen")
-        return {"status": "success", "message": "Klipper wurde erfolgreich installiert"}
-
-    except Exception as e:
-        logger.exception("Unerwarteter Fehler während der Installation")
-        raise HTTPException(status_code=500, detail=str(e))
+def _install_steps() -> List[JobStep]:
+    """Stellt die Schritte einer vollständigen Klipper-Installation zusammen"""
+    config_data = {
+        "serial_port": "/dev/ttyUSB0",
+        "kinematics": "cartesian",
+        "max_velocity": "300",
+        "max_accel": "3000",
+        "max_z_velocity": "5",
+        "max_z_accel": "100",
+        # Standard-Pins für RAMPS 1.4
+        "x_step_pin": "ar54",
+        "x_dir_pin": "ar55",
+        "x_enable_pin": "ar38",
+        "x_endstop_pin": "ar3",
+        "y_step_pin": "ar60",
+        "y_dir_pin": "ar61",
+        "y_enable_pin": "ar56",
+        "y_endstop_pin": "ar14",
+        "z_step_pin": "ar46",
+        "z_dir_pin": "ar48",
+        "z_enable_pin": "ar62",
+        "z_endstop_pin": "ar18",
+        "e_step_pin": "ar26",
+        "e_dir_pin": "ar28",
+        "e_enable_pin": "ar24",
+        "heater_pin": "ar10",
+        "fan_pin": "ar9",
+        "temp_pin": "analog1"
+    }
+
+    return [
+        ("install_klipper", installer.install_klipper),
+        ("compile_firmware", installer.compile_firmware),
+        ("flash_firmware", lambda: installer.flash_firmware("/dev/ttyUSB0")),
+        ("setup_klipper_service", installer.setup_klipper_service),
+        ("create_printer_config", lambda: installer.create_printer_config(config_data)),
+    ]
+
+def _get_job_or_404(job_id: str) -> Dict:
+    job = job_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    return job
+
+@router.post("/install/{printer_id}", response_model=InstallJobResponse, status_code=202)
+async def install_klipper(printer_id: str) -> Dict:
+    """Startet die Klipper-Installation für einen bestimmten Drucker als Hintergrund-Job"""
+    # Prüfe Root-Rechte
+    if os.getuid() != 0:
+        raise HTTPException(
+            status_code=403,
+            detail="Die Installation muss mit Root-Rechten ausgeführt werden"
+        )
+
+    job = job_manager.submit("install", _install_steps(), printer_id=printer_id)
+    logger.debug(f"Klipper-Installation als Job {job['id']} gestartet")
+    return job
+
+@router.post("/provision", response_model=InstallJobResponse, status_code=202)
+async def provision_boards(request: ProvisionRequest) -> Dict:
+    """Kompiliert und flasht mehrere Boards parallel als Hintergrund-Job"""
+    if os.getuid() != 0:
+        raise HTTPException(
+            status_code=403,
+            detail="Die Installation muss mit Root-Rechten ausgeführt werden"
+        )
+
+    targets = [target.dict() for target in request.targets]
+    job = job_manager.submit(
+        "provision",
+        [("provision", lambda: scheduler.provision(targets))],
+        params={"targets": targets}
+    )
+    logger.debug(f"Einrichtung von {len(targets)} Boards als Job {job['id']} gestartet")
+    return job
+
+@router.get("/firmware/cache")
+async def get_firmware_cache_stats():
+    """Gibt Trefferstatistiken und Einträge des Firmware-Caches zurück"""
+    return {
+        "stats": installer.firmware_cache.get_stats(),
+        "entries": installer.firmware_cache.list_entries()
+    }
+
+@router.delete("/firmware/cache")
+async def clear_firmware_cache():
+    """Leert den Firmware-Cache"""
+    installer.firmware_cache.clear()
+    return {"message": "Firmware-Cache wurde geleert"}
+
+@router.get("/jobs", response_model=List[InstallJobResponse])
+async def list_jobs(status: Optional[str] = None):
+    """Gibt alle Installations-Jobs zurück"""
+    return job_manager.list_jobs(status)
+
+@router.get("/jobs/{job_id}", response_model=InstallJobResponse)
+async def get_job(job_id: str):
+    """Gibt den Status eines Jobs zurück"""
+    return _get_job_or_404(job_id)
+
+@router.get("/jobs/{job_id}/steps", response_model=List[InstallJobStep])
+async def get_job_steps(job_id: str):
+    """Gibt die Schritte eines Jobs inklusive Laufzeiten zurück"""
+    return _get_job_or_404(job_id)["steps"]
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Gibt das Ergebnis eines abgeschlossenen Jobs zurück"""
+    job = _get_job_or_404(job_id)
+    if job["status"] in ("pending", "running"):
+        raise HTTPException(status_code=409, detail="Job ist noch nicht abgeschlossen")
+    return {"status": job["status"], "error": job["error"], "result": job["result"]}
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Bricht einen laufenden Job ab"""
+    _get_job_or_404(job_id)
+    if not await job_manager.cancel_job(job_id):
+        raise HTTPException(status_code=409, detail="Job läuft nicht")
+    return {"message": "Job abgebrochen"}
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from ..services.interface_manager import InterfaceManager
+from ..services.command_runner import set_output_handler, reset_output_handler
+from ..websockets.connection_manager import manager
 
 router = APIRouter()
 interface_manager = InterfaceManager()
@@ -17,6 +19,10 @@ async def get_current_interface():
 @router.post("/interfaces/switch")
 async def switch_interface(request: InterfaceRequest):
     """Wechselt zwischen Fluidd und Mainsail"""
+    async def stream_output(stream: str, line: str):
+        await manager.broadcast_installation_progress(f"install_{request.interface}", 0.0, line, stream=stream)
+
+    token = set_output_handler(stream_output)
     try:
         success = await interface_manager.switch_interface(request.interface)
         if success:
@@ -27,3 +33,5 @@ async def switch_interface(request: InterfaceRequest):
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        reset_output_handler(token)
@@ -1,18 +1,24 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
 from ..websockets.connection_manager import manager
-from ..core.auth import get_current_user
+from ..websockets.websocket_manager import websocket_manager
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+@router.get("/ws/stats")
+async def websocket_stats():
+    """Gibt Tiefe und verworfene Nachrichten der Sendewarteschlangen je Client zurück"""
+    return {"clients": manager.get_client_stats(), "dispatcher": websocket_manager.get_stats()}
+
 @router.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     try:
         await manager.connect(websocket, client_id)
         
         # Sende initiale Bestätigung
-        await websocket.send_json({
+        await manager.send_to_socket(websocket, {
             "type": "connection_established",
             "data": {
                 "client_id": client_id,
@@ -27,20 +33,35 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                 
                 # Verarbeite verschiedene Nachrichtentypen
                 if data.get("type") == "ping":
-                    await websocket.send_json({
+                    await manager.send_to_socket(websocket, {
                         "type": "pong",
                         "data": {"timestamp": data.get("timestamp")}
                     })
                     
-                elif data.get("type") == "subscribe":
-                    # Hier könnte eine Subscription-Logik implementiert werden
-                    pass
+                elif data.get("type") in ("subscribe", "unsubscribe"):
+                    topics = data.get("topics") or []
+                    try:
+                        if data["type"] == "subscribe":
+                            subscriptions = manager.subscribe(websocket, topics)
+                        else:
+                            subscriptions = manager.unsubscribe(websocket, topics)
+                    except ValueError as e:
+                        await manager.broadcast_error("Ungültiges Abonnement", str(e), client_id)
+                        continue
+                    await manager.send_to_socket(websocket, {
+                        "type": "subscriptions",
+                        "data": {"topics": subscriptions}
+                    })
                     
             except WebSocketDisconnect:
                 manager.disconnect(websocket, client_id)
                 break
                 
             except Exception as e:
+                # Verbindung wurde serverseitig getrennt (z.B. als langsamer Client entfernt)
+                if websocket.client_state != WebSocketState.CONNECTED:
+                    manager.disconnect(websocket, client_id)
+                    break
                 logger.error(f"Error processing WebSocket message: {e}")
                 await manager.broadcast_error(
                     "Fehler bei der Verarbeitung der WebSocket Nachricht",
@@ -80,3 +80,36 @@ class WebInterfaceResponse(BaseModel):
 class WebInterfaceSwitchRequest(BaseModel):
     """Modell für die Anfrage zum Wechseln des Webinterfaces"""
     interface: str = Field(..., description="Name des zu aktivierenden Webinterfaces")
+
+class InstallJobStep(BaseModel):
+    """Modell für einen einzelnen Schritt eines Installations-Jobs"""
+    name: str = Field(..., description="Name des Schritts")
+    status: str = Field(..., description="Status des Schritts (pending/running/success/error/skipped)")
+    started_at: Optional[str] = Field(None, description="Startzeitpunkt (ISO 8601)")
+    finished_at: Optional[str] = Field(None, description="Endzeitpunkt (ISO 8601)")
+    duration: Optional[float] = Field(None, description="Dauer in Sekunden")
+    result: Optional[Dict[str, Any]] = Field(None, description="Ergebnis des Schritts")
+
+class InstallJobResponse(BaseModel):
+    """Modell für einen Installations-Job"""
+    id: str = Field(..., description="Eindeutige ID des Jobs")
+    type: str = Field(..., description="Art des Jobs")
+    printer_id: Optional[str] = Field(None, description="ID des Druckers")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Parameter des Jobs")
+    status: str = Field(..., description="Status des Jobs (pending/running/success/error/interrupted/cancelled)")
+    created_at: str = Field(..., description="Erstellungszeitpunkt (ISO 8601)")
+    started_at: Optional[str] = Field(None, description="Startzeitpunkt (ISO 8601)")
+    finished_at: Optional[str] = Field(None, description="Endzeitpunkt (ISO 8601)")
+    steps: List[InstallJobStep] = Field(default_factory=list, description="Schritte des Jobs")
+    result: Optional[Dict[str, Any]] = Field(None, description="Ergebnis des Jobs")
+    error: Optional[str] = Field(None, description="Fehlermeldung bei fehlgeschlagenem Job")
+
+class ProvisionTarget(BaseModel):
+    """Modell für ein Board, das eingerichtet werden soll"""
+    port: str = Field(..., description="Serieller Port des Boards")
+    mcu_type: Optional[str] = Field(None, description="Typ des Mikrocontrollers")
+    processor: Optional[str] = Field(None, description="Prozessorfamilie (z.B. AVR, STM32)")
+
+class ProvisionRequest(BaseModel):
+    """Modell für die parallele Einrichtung mehrerer Boards"""
+    targets: List[ProvisionTarget] = Field(..., min_length=1, description="Liste der einzurichtenden Boards")
@@ -4,7 +4,9 @@ from fastapi.middleware.cors import CORSMiddleware
 import os
 from pathlib import Path
 
-from src.backend.api import install_routes, printer_routes
+from src.backend.api import install_routes, printer_routes, websocket_routes
+from src.backend.websockets.websocket_manager import websocket_manager
+from src.backend.websockets.connection_manager import manager
 
 app = FastAPI()
 
@@ -17,9 +19,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def startup():
+    """Startet die Hintergrunddienste"""
+    await websocket_manager.start()
+    await manager.start_pubsub()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Beendet die Hintergrunddienste"""
+    await manager.stop_pubsub()
+    await websocket_manager.stop()
+
 # API-Routen einbinden
 app.include_router(install_routes.router, prefix="/api/v1")
 app.include_router(printer_routes.router, prefix="/api/v1")
+app.include_router(websocket_routes.router)
 
 # Frontend-Dateien einbinden
 frontend_path = Path(__file__).parent.parent.parent / "src" / "frontend" / "dist"
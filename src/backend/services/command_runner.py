@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from collections import deque
+from contextvars import ContextVar, Token
+from typing import Awaitable, Callable, Deque, Optional
+
+logger = logging.getLogger(__name__)
+
+# Handler für einzelne Ausgabezeilen: (stream, zeile) mit stream "stdout" oder "stderr"
+OutputHandler = Callable[[str, str], Awaitable[None]]
+
+# Der Handler gilt pro asyncio-Task, damit parallele Jobs ihre Ausgaben nicht vermischen
+_output_handler: ContextVar[Optional[OutputHandler]] = ContextVar("command_output_handler", default=None)
+
+CHUNK_SIZE = 64 * 1024
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class CommandResult:
+    def __init__(self, returncode: int, stdout_tail: Deque[str], stderr_tail: Deque[str], line_count: int):
+        self.returncode = returncode
+        self.stdout = "\n".join(stdout_tail)
+        self.stderr = "\n".join(stderr_tail)
+        self.line_count = line_count
+
+
+def set_output_handler(handler: Optional[OutputHandler]) -> Token:
+    """Setzt den Ausgabe-Handler für den aktuellen Task"""
+    return _output_handler.set(handler)
+
+
+def reset_output_handler(token: Token):
+    """Stellt den vorherigen Ausgabe-Handler wieder her"""
+    _output_handler.reset(token)
+
+
+async def _pump(reader: asyncio.StreamReader, stream: str, tail: Deque[str],
+                handler: Optional[OutputHandler], counter: list):
+    """Liest einen Ausgabestrom zeilenweise und reicht jede Zeile an den Handler weiter"""
+    pending = b""
+    while True:
+        chunk = await reader.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        # \r als Zeilenende behandeln, damit Fortschrittsanzeigen (git, wget) sofort ankommen
+        pending += chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > MAX_LINE_LENGTH:
+            lines.append(pending)
+            pending = b""
+        for raw in lines:
+            await _emit(raw, stream, tail, handler, counter)
+    if pending:
+        await _emit(pending, stream, tail, handler, counter)
+
+
+async def _emit(raw: bytes, stream: str, tail: Deque[str], handler: Optional[OutputHandler], counter: list):
+    """Übernimmt eine Zeile in den Puffer und ruft den Handler auf"""
+    line = raw.decode(errors="replace")
+    if not line:
+        return
+    tail.append(line)
+    counter[0] += 1
+    if handler is None:
+        return
+    # Es wird erst weitergelesen, wenn der Handler fertig ist (Backpressure bis zum Prozess)
+    try:
+        await handler(stream, line)
+    except Exception as e:
+        logger.debug(f"Fehler im Ausgabe-Handler: {e}")
+
+
+async def run_streaming(cmd: str, cwd: str = None, on_output: OutputHandler = None,
+                        tail_lines: int = 200) -> CommandResult:
+    """Führt einen Shell-Befehl aus und streamt dessen Ausgabe zeilenweise
+
+    Von stdout und stderr werden nur die letzten tail_lines Zeilen behalten,
+    der Speicherbedarf bleibt daher auch bei sehr gesprächigen Builds konstant.
+    """
+    handler = on_output or _output_handler.get()
+    process = await asyncio.create_subprocess_shell(
+        cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd
+    )
+    stdout_tail: Deque[str] = deque(maxlen=tail_lines)
+    stderr_tail: Deque[str] = deque(maxlen=tail_lines)
+    counter = [0]
+    try:
+        await asyncio.gather(
+            _pump(process.stdout, "stdout", stdout_tail, handler, counter),
+            _pump(process.stderr, "stderr", stderr_tail, handler, counter)
+        )
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    return CommandResult(returncode, stdout_tail, stderr_tail, counter[0])
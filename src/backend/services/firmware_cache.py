@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Build-Artefakte, die im Cache abgelegt werden
+FIRMWARE_ARTIFACTS = ("klipper.elf.hex", "klipper.bin", "klipper.uf2")
+
+
+class FirmwareCache:
+    def __init__(self, cache_dir: str, max_size_bytes: int = 512 * 1024 * 1024):
+        """Initialisiert den inhaltsadressierten Firmware-Cache"""
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._load_index()
+
+    def _load_index(self):
+        """Lädt den Cache-Index"""
+        self._index: Dict[str, Dict] = {}
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+        except Exception as e:
+            logger.error(f"Fehler beim Laden des Firmware-Cache-Index: {e}")
+            return
+        # Nur Einträge übernehmen, deren Verzeichnis noch existiert
+        self._index = {
+            key: entry for key, entry in index.items()
+            if os.path.isdir(os.path.join(self.cache_dir, key))
+        }
+
+    def _save_index(self):
+        """Speichert den Cache-Index"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_file, self.index_file)
+
+    @staticmethod
+    def make_key(config: str, klipper_commit: str) -> str:
+        """Erzeugt den Cache-Schlüssel aus Kconfig-Inhalt und Klipper-Commit"""
+        digest = hashlib.sha256()
+        digest.update(klipper_commit.encode())
+        digest.update(b"\0")
+        digest.update(config.encode())
+        return digest.hexdigest()
+
+    def restore(self, key: str, target_dir: str) -> bool:
+        """Kopiert die gecachten Artefakte nach target_dir; gibt False bei einem Cache-Miss zurück"""
+        entry = self._index.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return False
+
+        entry_dir = os.path.join(self.cache_dir, key)
+        try:
+            os.makedirs(target_dir, exist_ok=True)
+            for artifact in entry["artifacts"]:
+                shutil.copy2(os.path.join(entry_dir, artifact), os.path.join(target_dir, artifact))
+        except OSError as e:
+            logger.warning(f"Firmware-Cache-Eintrag {key} ist beschädigt: {e}")
+            self._remove_entry(key)
+            self._save_index()
+            self._stats["misses"] += 1
+            return False
+
+        entry["last_used"] = time.time()
+        entry["hits"] = entry.get("hits", 0) + 1
+        self._save_index()
+        self._stats["hits"] += 1
+        return True
+
+    def store(self, key: str, source_dir: str) -> bool:
+        """Legt die Build-Artefakte aus source_dir im Cache ab"""
+        artifacts = [name for name in FIRMWARE_ARTIFACTS if os.path.exists(os.path.join(source_dir, name))]
+        if not artifacts:
+            return False
+
+        entry_dir = os.path.join(self.cache_dir, key)
+        tmp_dir = f"{entry_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        size = 0
+        for artifact in artifacts:
+            target = os.path.join(tmp_dir, artifact)
+            shutil.copy2(os.path.join(source_dir, artifact), target)
+            size += os.path.getsize(target)
+
+        # Erst vollständig kopieren, dann unter dem endgültigen Namen sichtbar machen
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.rename(tmp_dir, entry_dir)
+
+        now = time.time()
+        self._index[key] = {"artifacts": artifacts, "size": size, "created": now, "last_used": now, "hits": 0}
+        self._stats["stores"] += 1
+        self._evict()
+        self._save_index()
+        return True
+
+    def _remove_entry(self, key: str):
+        """Entfernt einen Eintrag aus Index und Dateisystem"""
+        self._index.pop(key, None)
+        shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+
+    def _evict(self):
+        """Entfernt die am längsten nicht genutzten Einträge, bis die Größenbegrenzung eingehalten wird"""
+        total = sum(entry["size"] for entry in self._index.values())
+        if total <= self.max_size_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_used"]):
+            if total <= self.max_size_bytes:
+                break
+            total -= self._index[key]["size"]
+            self._remove_entry(key)
+            self._stats["evictions"] += 1
+            logger.debug(f"Firmware-Cache-Eintrag {key} verdrängt")
+
+    def clear(self):
+        """Leert den gesamten Cache"""
+        for key in list(self._index):
+            self._remove_entry(key)
+        self._save_index()
+
+    def list_entries(self) -> List[Dict]:
+        """Gibt alle Cache-Einträge zurück, zuletzt genutzte zuerst"""
+        entries = [{"key": key, **entry} for key, entry in self._index.items()]
+        return sorted(entries, key=lambda entry: entry["last_used"], reverse=True)
+
+    def get_stats(self) -> Dict:
+        """Gibt Statistiken für den Cache zurück"""
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": len(self._index),
+            "size_bytes": sum(entry["size"] for entry in self._index.values()),
+            "max_size_bytes": self.max_size_bytes
+        }
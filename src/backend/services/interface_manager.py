@@ -1,9 +1,9 @@
 import os
 import subprocess
 import logging
-import asyncio
 from typing import Optional
 from pathlib import Path
+from .command_runner import run_streaming
 
 class InterfaceManager:
     def __init__(self):
@@ -36,15 +36,10 @@ class InterfaceManager:
             ]
             
             for cmd in commands:
-                process = await asyncio.create_subprocess_shell(
-                    cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, stderr = await process.communicate()
-                
-                if process.returncode != 0:
-                    raise Exception(f"Fehler beim Ausführen von {cmd}: {stderr.decode()}")
+                result = await run_streaming(cmd)
+
+                if result.returncode != 0:
+                    raise Exception(f"Fehler beim Ausführen von {cmd}: {result.stderr}")
             
             # Nginx-Konfiguration
             nginx_config = """
@@ -120,15 +115,10 @@ server {
             ]
             
             for cmd in commands:
-                process = await asyncio.create_subprocess_shell(
-                    cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, stderr = await process.communicate()
-                
-                if process.returncode != 0:
-                    raise Exception(f"Fehler beim Ausführen von {cmd}: {stderr.decode()}")
+                result = await run_streaming(cmd)
+
+                if result.returncode != 0:
+                    raise Exception(f"Fehler beim Ausführen von {cmd}: {result.stderr}")
             
             # Nginx-Konfiguration
             nginx_config = """
@@ -0,0 +1,201 @@
+import os
+import json
+import uuid
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from .command_runner import set_output_handler, reset_output_handler
+from ..websockets.connection_manager import manager
+
+logger = logging.getLogger(__name__)
+
+# Ein Schritt ist ein Name plus eine Coroutine-Factory, die ein Ergebnis-Dict
+# im Stil von KlipperInstaller ({"status": ..., "message": ...}) liefert
+JobStep = Tuple[str, Callable[[], Awaitable[Dict]]]
+
+ACTIVE_STATES = ("pending", "running")
+
+
+class JobManager:
+    def __init__(self, jobs_file: str = "config/jobs.json", max_concurrent_jobs: int = 4, max_history: int = 200):
+        """Initialisiert den JobManager und lädt persistierte Jobs"""
+        self.jobs_file = jobs_file
+        self.max_history = max_history
+        self.jobs: Dict[str, Dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrent_jobs)
+        self._load_jobs()
+
+    def _load_jobs(self):
+        """Lädt persistierte Jobs; laufende Jobs gelten nach einem Neustart als abgebrochen"""
+        if not os.path.exists(self.jobs_file):
+            return
+        try:
+            with open(self.jobs_file, 'r') as f:
+                jobs = json.load(f)
+        except Exception as e:
+            logger.error(f"Fehler beim Laden der Jobs: {e}")
+            return
+
+        interrupted = False
+        for job in jobs:
+            if job.get("status") in ACTIVE_STATES:
+                job["status"] = "interrupted"
+                job["error"] = "Der Server wurde während des Jobs neu gestartet"
+                job["finished_at"] = datetime.now().isoformat()
+                for step in job.get("steps", []):
+                    if step.get("status") in ACTIVE_STATES:
+                        step["status"] = "interrupted"
+                interrupted = True
+            self.jobs[job["id"]] = job
+
+        if interrupted:
+            self._save_jobs()
+
+    def _save_jobs(self):
+        """Speichert alle Jobs"""
+        try:
+            jobs_dir = os.path.dirname(self.jobs_file)
+            if jobs_dir:
+                os.makedirs(jobs_dir, exist_ok=True)
+            tmp_file = f"{self.jobs_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(list(self.jobs.values()), f, indent=2)
+            os.replace(tmp_file, self.jobs_file)
+        except Exception as e:
+            logger.error(f"Fehler beim Speichern der Jobs: {e}")
+
+    def _prune_history(self):
+        """Entfernt die ältesten abgeschlossenen Jobs, wenn das Limit überschritten ist"""
+        finished = [job for job in self.jobs.values() if job["status"] not in ACTIVE_STATES]
+        excess = len(self.jobs) - self.max_history
+        if excess <= 0:
+            return
+        finished.sort(key=lambda job: job["created_at"])
+        for job in finished[:excess]:
+            del self.jobs[job["id"]]
+
+    def submit(self, job_type: str, steps: List[JobStep], printer_id: str = None, params: Dict = None) -> Dict:
+        """Legt einen neuen Job an und startet ihn im Hintergrund"""
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id,
+            "type": job_type,
+            "printer_id": printer_id,
+            "params": params or {},
+            "status": "pending",
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "steps": [
+                {
+                    "name": name,
+                    "status": "pending",
+                    "started_at": None,
+                    "finished_at": None,
+                    "duration": None,
+                    "result": None
+                }
+                for name, _ in steps
+            ],
+            "result": None,
+            "error": None
+        }
+        self.jobs[job_id] = job
+        self._prune_history()
+        self._save_jobs()
+
+        task = asyncio.create_task(self._run_job(job_id, steps))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        logger.info(f"Job {job_id} ({job_type}) angelegt")
+        return job
+
+    async def _run_job(self, job_id: str, steps: List[JobStep]):
+        """Führt die Schritte eines Jobs nacheinander aus"""
+        job = self.jobs[job_id]
+        async with self._semaphore:
+            job["status"] = "running"
+            job["started_at"] = datetime.now().isoformat()
+            self._save_jobs()
+
+            result = None
+            try:
+                for index, (name, step_factory) in enumerate(steps):
+                    step = job["steps"][index]
+                    step["status"] = "running"
+                    step["started_at"] = datetime.now().isoformat()
+                    self._save_jobs()
+
+                    progress = round(index / len(steps), 3)
+                    await manager.broadcast_installation_progress(name, progress, f"Starte {name}", job_id=job_id)
+
+                    started = time.monotonic()
+                    token = set_output_handler(self._make_output_handler(job_id, name, progress))
+                    try:
+                        result = await step_factory()
+                    except Exception as e:
+                        result = {"status": "error", "message": str(e)}
+                    finally:
+                        reset_output_handler(token)
+                    step["duration"] = round(time.monotonic() - started, 3)
+                    step["finished_at"] = datetime.now().isoformat()
+                    step["result"] = result
+                    step["status"] = "error" if result.get("status") == "error" else "success"
+                    logger.debug(f"Job {job_id}: Schritt {name} beendet ({step['status']}, {step['duration']}s)")
+
+                    if step["status"] == "error":
+                        job["status"] = "error"
+                        job["error"] = result.get("message")
+                        break
+                else:
+                    job["status"] = "success"
+            except asyncio.CancelledError:
+                job["status"] = "cancelled"
+                raise
+            finally:
+                for step in job["steps"]:
+                    if step["status"] in ACTIVE_STATES:
+                        step["status"] = "skipped" if job["status"] == "error" else job["status"]
+                job["result"] = result
+                job["finished_at"] = datetime.now().isoformat()
+                self._save_jobs()
+                logger.info(f"Job {job_id} beendet: {job['status']}")
+
+            if job["status"] == "success":
+                await manager.broadcast_installation_progress("done", 1.0, "Job erfolgreich abgeschlossen", job_id=job_id)
+            else:
+                await manager.broadcast_error(f"Job {job_id} fehlgeschlagen", job["error"], job_id=job_id)
+
+    @staticmethod
+    def _make_output_handler(job_id: str, step: str, progress: float):
+        """Erzeugt einen Handler, der Befehlsausgaben eines Schritts an WebSocket-Clients streamt"""
+        async def handler(stream: str, line: str):
+            await manager.broadcast_installation_progress(step, progress, line, job_id=job_id, stream=stream)
+        return handler
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Gibt einen Job zurück"""
+        return self.jobs.get(job_id)
+
+    def list_jobs(self, status: str = None) -> List[Dict]:
+        """Gibt alle Jobs zurück, neueste zuerst"""
+        jobs = [job for job in self.jobs.values() if status is None or job["status"] == status]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    async def cancel_job(self, job_id: str) -> bool:
+        """Bricht einen laufenden Job ab"""
+        task = self._tasks.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+# Globale JobManager-Instanz
+job_manager = JobManager()
@@ -1,8 +1,16 @@
 import os
+import re
+import time
+import shutil
+import logging
 import subprocess
 import asyncio
 from typing import Dict, Optional, List
 from pathlib import Path
+from .firmware_cache import FirmwareCache, FIRMWARE_ARTIFACTS
+from .command_runner import run_streaming
+
+logger = logging.getLogger(__name__)
 
 class KlipperInstaller:
     def __init__(self, base_dir: str = None):
@@ -18,6 +26,8 @@ class KlipperInstaller:
         self.config_dir = os.path.join(self.base_dir, "printer_data/config")
         self.klipper_dir = os.path.join(self.base_dir, "klipper")
         self.firmware_dir = os.path.join(self.klipper_dir, "out")
+        self.firmware_cache = FirmwareCache(os.path.join(self.base_dir, "klipper-firmware-cache"))
+        self.ccache = shutil.which("ccache")
         
         # Erstelle notwendige Verzeichnisse
         os.makedirs(self.config_dir, exist_ok=True)
@@ -43,36 +53,93 @@ class KlipperInstaller:
         except Exception as e:
             return {"status": "error", "message": f"Fehler bei der Klipper-Installation: {str(e)}"}
 
-    async def compile_firmware(self, mcu_type: str = None, processor: str = None) -> Dict[str, str]:
-        """Kompiliert die Klipper-Firmware für den spezifizierten MCU"""
-        try:
-            # MCU-Typ basierend auf USB-ID bestimmen
-            if mcu_type is None:
-                # CH340 (1A86:7523) -> Meist Arduino Mega/RAMPS
-                mcu_type = "atmega2560"
-                processor = "AVR"
+    async def compile_firmware(self, mcu_type: str = None, processor: str = None, build_dir: str = None,
+                               firmware_config: str = None, jobs: int = None) -> Dict[str, str]:
+        """Kompiliert die Klipper-Firmware für den spezifizierten MCU
 
-            # Konfigurationsdatei erstellen
-            config = f"""CONFIG_LOW_LEVEL_OPTIONS=y
+        Mit build_dir werden .config und out/ in ein eigenes Verzeichnis gelegt,
+        sodass mehrere Builds parallel aus demselben Klipper-Checkout laufen können.
+        firmware_config übernimmt eine vollständige Kconfig (z.B. config/*/firmware.config).
+        """
+        try:
+            if firmware_config is not None:
+                config = firmware_config
+            else:
+                # MCU-Typ basierend auf USB-ID bestimmen
+                if mcu_type is None:
+                    # CH340 (1A86:7523) -> Meist Arduino Mega/RAMPS
+                    mcu_type = "atmega2560"
+                    processor = "AVR"
+
+                # Konfigurationsdatei erstellen
+                config = f"""CONFIG_LOW_LEVEL_OPTIONS=y
 CONFIG_MACH_{processor.upper()}=y
 CONFIG_{mcu_type.upper()}=y
 """
-            config_path = os.path.join(self.klipper_dir, ".config")
+            if build_dir is None:
+                config_path = os.path.join(self.klipper_dir, ".config")
+                firmware_dir = self.firmware_dir
+                make_args = ""
+            else:
+                os.makedirs(build_dir, exist_ok=True)
+                config_path = os.path.join(build_dir, ".config")
+                firmware_dir = os.path.join(build_dir, "out")
+                make_args = f" KCONFIG_CONFIG={config_path} OUT={firmware_dir}/"
+
             with open(config_path, "w") as f:
                 f.write(config)
 
-            # Firmware kompilieren
-            await self._run_command("make clean", cwd=self.klipper_dir)
-            await self._run_command("make", cwd=self.klipper_dir)
-
-            if not os.path.exists(os.path.join(self.firmware_dir, "klipper.elf.hex")):
+            # Identische Konfiguration auf demselben Klipper-Stand -> Artefakte aus dem Cache
+            commit = await self._get_klipper_commit()
+            cache_key = self.firmware_cache.make_key(config, commit) if commit else None
+            if cache_key and self.firmware_cache.restore(cache_key, firmware_dir):
+                logger.info(f"Firmware-Build: Artefakte aus dem Cache übernommen ({cache_key[:12]})")
+                return {
+                    "status": "success",
+                    "message": "Firmware wurde aus dem Cache übernommen",
+                    "firmware_dir": firmware_dir,
+                    "cached": True
+                }
+
+            # Firmware inkrementell kompilieren; Klipper erkennt geänderte Kconfig-Optionen
+            # selbst, nur beim Wechsel der Prozessorfamilie muss out/ geleert werden
+            build_steps = []
+            family = self._get_mcu_family(config)
+            family_stamp = os.path.join(firmware_dir, ".mcu_family")
+            previous_family = None
+            if os.path.exists(family_stamp):
+                with open(family_stamp, "r") as f:
+                    previous_family = f.read().strip()
+            if previous_family != family:
+                build_steps.append(await self._run_build_step("make clean", f"make clean{make_args}"))
+
+            jobs = jobs or os.cpu_count() or 1
+            if self.ccache:
+                # CC wird von make erst beim Aufruf expandiert, CROSS_PREFIX stammt aus Klippers Makefile
+                make_args += " 'CC=ccache $(CROSS_PREFIX)gcc'"
+            build_steps.append(await self._run_build_step("make", f"make -j{jobs}{make_args}"))
+
+            # AVR erzeugt klipper.elf.hex, STM32/RP2040 klipper.bin bzw. klipper.uf2
+            if not any(os.path.exists(os.path.join(firmware_dir, name)) for name in FIRMWARE_ARTIFACTS):
                 raise Exception("Firmware-Kompilierung fehlgeschlagen")
 
-            return {"status": "success", "message": "Firmware wurde erfolgreich kompiliert"}
+            with open(family_stamp, "w") as f:
+                f.write(family)
+
+            if cache_key:
+                self.firmware_cache.store(cache_key, firmware_dir)
+
+            return {
+                "status": "success",
+                "message": "Firmware wurde erfolgreich kompiliert",
+                "firmware_dir": firmware_dir,
+                "cached": False,
+                "build_steps": build_steps
+            }
         except Exception as e:
             return {"status": "error", "message": f"Fehler bei der Firmware-Kompilierung: {str(e)}"}
 
-    async def flash_firmware(self, port: str, mcu_type: str = None) -> Dict[str, str]:
+    async def flash_firmware(self, port: str, mcu_type: str = None, firmware_dir: str = None) -> Dict[str, str]:
         """Flasht die kompilierte Firmware auf den MCU"""
         try:
             if mcu_type is None:
@@ -83,7 +150,7 @@ CONFIG_{mcu_type.upper()}=y
                 raise Exception(f"Port {port} nicht gefunden")
 
             # Stelle sicher, dass die Firmware existiert
-            firmware_path = os.path.join(self.firmware_dir, "klipper.elf.hex")
+            firmware_path = os.path.join(firmware_dir or self.firmware_dir, "klipper.elf.hex")
             if not os.path.exists(firmware_path):
                 raise Exception("Firmware-Datei nicht gefunden")
 
@@ -259,17 +326,39 @@ gcode:
         except Exception as e:
             return {"status": "error", "message": f"Fehler beim Erstellen der Konfiguration: {str(e)}"}
 
+    @staticmethod
+    def _get_mcu_family(config: str) -> str:
+        """Ermittelt die Prozessorfamilie (CONFIG_MACH_*) aus einer Kconfig"""
+        match = re.search(r"^CONFIG_MACH_(\w+)=y", config, re.MULTILINE)
+        return match.group(1).lower() if match else "unknown"
+
+    async def _run_build_step(self, step: str, cmd: str) -> Dict:
+        """Führt einen Build-Schritt aus und protokolliert dessen Dauer"""
+        started = time.monotonic()
+        await self._run_command(cmd, cwd=self.klipper_dir)
+        duration = round(time.monotonic() - started, 3)
+        logger.info(f"Firmware-Build: {step} abgeschlossen in {duration}s")
+        return {"step": step, "duration": duration}
+
+    async def _get_klipper_commit(self) -> Optional[str]:
+        """Gibt den aktuellen Klipper-Commit zurück; None bei lokalen Änderungen oder ohne Git"""
+        try:
+            commit = (await self._run_command("git describe --always --dirty --abbrev=40", cwd=self.klipper_dir)).strip()
+        except Exception:
+            return None
+        if not commit or commit.endswith("-dirty"):
+            return None
+        return commit
+
     async def _run_command(self, cmd: str, cwd: str = None) -> str:
-        """Führt einen Shell-Befehl aus und gibt die Ausgabe zurück"""
-        process = await asyncio.create_subprocess_shell(
-            cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd=cwd
-        )
-        stdout, stderr = await process.communicate()
-        
-        if process.returncode != 0:
-            raise Exception(f"Befehl fehlgeschlagen: {stderr.decode()}")
-        
-        return stdout.decode()
+        """Führt einen Shell-Befehl aus und gibt die Ausgabe zurück
+
+        Die Ausgabe wird zeilenweise an den Ausgabe-Handler des aktuellen Jobs
+        gestreamt; zurückgegeben werden nur die letzten Zeilen von stdout.
+        """
+        result = await run_streaming(cmd, cwd=cwd)
+
+        if result.returncode != 0:
+            raise Exception(f"Befehl fehlgeschlagen: {result.stderr}")
+
+        return result.stdout
@@ -0,0 +1,95 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+from .klipper_installer import KlipperInstaller
+
+logger = logging.getLogger(__name__)
+
+
+class ProvisioningScheduler:
+    def __init__(self, installer: KlipperInstaller, max_parallel_builds: int = None):
+        """Initialisiert den Scheduler für die parallele Einrichtung mehrerer Boards"""
+        self.installer = installer
+        self.max_parallel_builds = max_parallel_builds or os.cpu_count() or 1
+        self.builds_dir = os.path.join(installer.base_dir, "klipper-builds")
+        self._build_semaphore = asyncio.Semaphore(self.max_parallel_builds)
+        self._active_builds = 0
+        self._build_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._port_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    @staticmethod
+    def _build_key(mcu_type: Optional[str], processor: Optional[str]) -> str:
+        """Erzeugt einen dateisystemtauglichen Schlüssel für eine Build-Konfiguration"""
+        key = f"{processor or 'default'}-{mcu_type or 'default'}".lower()
+        return re.sub(r"[^a-z0-9_.-]", "_", key)
+
+    async def _compile(self, mcu_type: Optional[str], processor: Optional[str]) -> Dict:
+        """Kompiliert eine Firmware in ihrem eigenen Build-Verzeichnis"""
+        key = self._build_key(mcu_type, processor)
+        # Ein Build-Verzeichnis wird nie von zwei Builds gleichzeitig benutzt
+        async with self._build_locks[key]:
+            async with self._build_semaphore:
+                # Die CPU-Kerne werden auf die gleichzeitig laufenden Builds aufgeteilt
+                self._active_builds += 1
+                jobs = max(1, (os.cpu_count() or 1) // self._active_builds)
+                started = time.monotonic()
+                try:
+                    result = await self.installer.compile_firmware(
+                        mcu_type,
+                        processor,
+                        build_dir=os.path.join(self.builds_dir, key),
+                        jobs=jobs
+                    )
+                finally:
+                    self._active_builds -= 1
+                result["duration"] = round(time.monotonic() - started, 3)
+                return result
+
+    async def _flash(self, port: str, mcu_type: Optional[str], firmware_dir: str) -> Dict:
+        """Flasht ein Board; pro Port läuft immer nur ein Vorgang"""
+        async with self._port_locks[port]:
+            started = time.monotonic()
+            result = await self.installer.flash_firmware(port, mcu_type, firmware_dir=firmware_dir)
+            result["duration"] = round(time.monotonic() - started, 3)
+            return result
+
+    async def _provision_target(self, target: Dict, builds: Dict[str, asyncio.Task]) -> Dict:
+        """Kompiliert und flasht ein einzelnes Ziel"""
+        port = target["port"]
+        mcu_type = target.get("mcu_type")
+        processor = target.get("processor")
+        entry = {"port": port, "mcu_type": mcu_type, "processor": processor}
+
+        # Identische Konfigurationen innerhalb eines Laufs werden nur einmal gebaut
+        key = self._build_key(mcu_type, processor)
+        if key not in builds:
+            builds[key] = asyncio.create_task(self._compile(mcu_type, processor))
+        compile_result = await builds[key]
+        entry["compile"] = compile_result
+        if compile_result["status"] == "error":
+            entry.update(status="error", message=compile_result["message"])
+            return entry
+
+        flash_result = await self._flash(port, mcu_type, compile_result["firmware_dir"])
+        entry["flash"] = flash_result
+        entry.update(status=flash_result["status"], message=flash_result["message"])
+        return entry
+
+    async def provision(self, targets: List[Dict]) -> Dict:
+        """Richtet alle Ziele parallel ein und gibt eine Zusammenfassung zurück"""
+        builds: Dict[str, asyncio.Task] = {}
+        results = await asyncio.gather(*(self._provision_target(target, builds) for target in targets))
+
+        failed = [result for result in results if result["status"] == "error"]
+        if failed:
+            status = "error"
+            message = f"{len(failed)} von {len(results)} Boards konnten nicht eingerichtet werden"
+        else:
+            status = "success"
+            message = f"{len(results)} Boards wurden erfolgreich eingerichtet"
+        logger.info(message)
+        return {"status": status, "message": message, "targets": list(results)}
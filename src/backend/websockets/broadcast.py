@@ -0,0 +1,22 @@
+from fastapi import WebSocket
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Standard-Timeout pro Sendevorgang; langsamere Clients werden getrennt
+SEND_TIMEOUT = 5.0
+
+
+def encode_message(message: dict) -> str:
+    """Serialisiert eine Nachricht einmalig (gleiches Format wie WebSocket.send_json)"""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+async def close_quietly(websocket: WebSocket, timeout: float = SEND_TIMEOUT):
+    """Schließt eine Verbindung, ohne auf hängende Clients zu warten"""
+    try:
+        await asyncio.wait_for(websocket.close(), timeout)
+    except Exception:
+        pass
@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+from fastapi import WebSocket
+import asyncio
+import logging
+from .broadcast import SEND_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_COALESCE = "coalesce"
+QUEUE_POLICIES = (POLICY_DROP_OLDEST, POLICY_COALESCE)
+
+
+def coalesce_key(message: dict) -> Optional[Hashable]:
+    """Gibt den Schlüssel zurück, unter dem eine Nachricht durch neuere ersetzt werden darf
+
+    Nur Status-Nachrichten sind ersetzbar: Für einen Drucker zählt ausschließlich
+    der letzte Stand. Log-Zeilen und Fehler gehen nie durch Zusammenfassen verloren.
+    """
+    if message.get("type") == "printer_status":
+        return ("printer_status", message.get("data", {}).get("printer_id"))
+    return None
+
+
+class ClientSendQueue:
+    def __init__(self, websocket: WebSocket, maxsize: int = 256, policy: str = POLICY_COALESCE,
+                 send_timeout: float = SEND_TIMEOUT, on_failure: Callable[[WebSocket], None] = None):
+        """Begrenzte Sendewarteschlange mit eigenem Writer-Task für eine Verbindung"""
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unbekannte Queue-Policy: {policy}")
+        self.websocket = websocket
+        self.maxsize = maxsize
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self._on_failure = on_failure
+        self._pending: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+        self._stats = {"sent": 0, "dropped": 0, "coalesced": 0, "max_depth": 0}
+        self._task = asyncio.create_task(self._writer())
+
+    def put(self, text: str, key: Hashable = None) -> None:
+        """Reiht einen serialisierten Text ein, ohne zu blockieren"""
+        if key is not None and self.policy == POLICY_COALESCE and key in self._pending:
+            # Neuester Stand ersetzt den wartenden, die Position in der Queue bleibt erhalten
+            self._pending[key] = text
+            self._stats["coalesced"] += 1
+            return
+
+        if len(self._pending) >= self.maxsize:
+            self._pending.popitem(last=False)
+            self._stats["dropped"] += 1
+
+        if key is None or self.policy != POLICY_COALESCE:
+            self._sequence += 1
+            key = ("seq", self._sequence)
+        self._pending[key] = text
+        self._stats["max_depth"] = max(self._stats["max_depth"], len(self._pending))
+        self._wakeup.set()
+
+    async def _writer(self):
+        """Sendet wartende Nachrichten nacheinander an den Client"""
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            _, text = self._pending.popitem(last=False)
+            try:
+                await asyncio.wait_for(self.websocket.send_text(text), self.send_timeout)
+                self._stats["sent"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Senden an WebSocket fehlgeschlagen: {type(e).__name__}: {e}")
+                self._pending.clear()
+                if self._on_failure is not None:
+                    self._on_failure(self.websocket)
+                return
+
+    def close(self) -> None:
+        """Beendet den Writer-Task und verwirft wartende Nachrichten"""
+        self._pending.clear()
+        if not self._task.done() and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def get_stats(self) -> dict:
+        """Gibt Statistiken für die Warteschlange zurück"""
+        return {
+            "depth": len(self._pending),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            **self._stats
+        }
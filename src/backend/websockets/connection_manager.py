@@ -1,48 +1,218 @@
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Set
 from fastapi import WebSocket
-import json
+import os
+import uuid
+import asyncio
 import logging
+from .broadcast import SEND_TIMEOUT, encode_message, close_quietly
+from .client_queue import ClientSendQueue, POLICY_COALESCE, coalesce_key
+from .pubsub import PubSubBackend, create_backend
 
 logger = logging.getLogger(__name__)
 
+# Verbindungen ohne eigene Abonnements erhalten alle Nachrichten (Rückwärtskompatibilität)
+ALL_TOPICS = "*"
+TOPIC_PREFIXES = ("printer", "job", "type")
+
+
+def printer_topic(printer_id: str) -> str:
+    return f"printer:{printer_id}"
+
+
+def job_topic(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def type_topic(message_type: str) -> str:
+    return f"type:{message_type}"
+
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, send_timeout: float = SEND_TIMEOUT, queue_size: int = 256, queue_policy: str = POLICY_COALESCE):
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.send_timeout = send_timeout
+        self.queue_size = queue_size
+        self.queue_policy = queue_policy
+        self._socket_clients: Dict[WebSocket, str] = {}
+        # Index Topic -> Verbindungen und Verbindung -> Topics
+        self._topic_index: Dict[str, Set[WebSocket]] = {}
+        self._socket_topics: Dict[WebSocket, Set[str]] = {}
+        # Jede Verbindung hat eine eigene, begrenzte Sendewarteschlange mit Writer-Task
+        self._queues: Dict[WebSocket, ClientSendQueue] = {}
+        # Pub/Sub verteilt Nachrichten an die Clients der anderen Worker-Prozesse
+        self.node_id = uuid.uuid4().hex
+        self._backend: Optional[PubSubBackend] = None
+
+    async def start_pubsub(self, backend: PubSubBackend = None):
+        """Startet die Verteilung über Worker-Grenzen (Standard: KLIPPER_PUBSUB_URL)"""
+        if self._backend is not None:
+            return
+        self._backend = backend or create_backend(os.environ.get("KLIPPER_PUBSUB_URL"))
+        await self._backend.start(self._on_remote_message)
+        logger.info(f"Pub/Sub-Backend {type(self._backend).__name__} gestartet")
+
+    async def stop_pubsub(self):
+        """Beendet die Verteilung über Worker-Grenzen"""
+        if self._backend is not None:
+            await self._backend.stop()
+            self._backend = None
+
+    async def _on_remote_message(self, envelope: dict):
+        """Stellt eine von einem anderen Worker veröffentlichte Nachricht lokal zu"""
+        if envelope.get("origin") == self.node_id:
+            return
+        key = envelope.get("key")
+        self._deliver_local(
+            envelope["text"],
+            tuple(key) if key is not None else None,
+            envelope.get("client_id"),
+            envelope.get("topics")
+        )
 
     async def connect(self, websocket: WebSocket, client_id: str):
         await websocket.accept()
         if client_id not in self.active_connections:
             self.active_connections[client_id] = []
         self.active_connections[client_id].append(websocket)
+        self._socket_clients[websocket] = client_id
+        self._queues[websocket] = ClientSendQueue(
+            websocket,
+            maxsize=self.queue_size,
+            policy=self.queue_policy,
+            send_timeout=self.send_timeout,
+            on_failure=self._evict
+        )
+        self._add_topics(websocket, [ALL_TOPICS])
         logger.info(f"Client {client_id} connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket, client_id: str):
         if client_id in self.active_connections:
-            self.active_connections[client_id].remove(websocket)
+            if websocket in self.active_connections[client_id]:
+                self.active_connections[client_id].remove(websocket)
             if not self.active_connections[client_id]:
                 del self.active_connections[client_id]
+        self._remove_topics(websocket, list(self._socket_topics.get(websocket, ())))
+        self._socket_topics.pop(websocket, None)
+        self._socket_clients.pop(websocket, None)
+        queue = self._queues.pop(websocket, None)
+        if queue is not None:
+            queue.close()
         logger.info(f"Client {client_id} disconnected. Total connections: {len(self.active_connections)}")
 
-    async def send_message(self, message: dict, client_id: str = None):
+    @staticmethod
+    def validate_topic(topic: str) -> bool:
+        """Prüft, ob ein Topic ein bekanntes Format hat (printer:<id>, job:<id>, type:<typ> oder *)"""
+        if topic == ALL_TOPICS:
+            return True
+        prefix, _, value = topic.partition(":")
+        return prefix in TOPIC_PREFIXES and bool(value)
+
+    def _add_topics(self, websocket: WebSocket, topics: Iterable[str]):
+        socket_topics = self._socket_topics.setdefault(websocket, set())
+        for topic in topics:
+            self._topic_index.setdefault(topic, set()).add(websocket)
+            socket_topics.add(topic)
+
+    def _remove_topics(self, websocket: WebSocket, topics: Iterable[str]):
+        socket_topics = self._socket_topics.get(websocket, set())
+        for topic in topics:
+            subscribers = self._topic_index.get(topic)
+            if subscribers is not None:
+                subscribers.discard(websocket)
+                if not subscribers:
+                    del self._topic_index[topic]
+            socket_topics.discard(topic)
+
+    def subscribe(self, websocket: WebSocket, topics: List[str]) -> List[str]:
+        """
+        Abonniert Topics für eine Verbindung; das erste Abonnement beendet den Empfang aller Nachrichten
+        """
+        invalid = [topic for topic in topics if not self.validate_topic(topic)]
+        if invalid:
+            raise ValueError(f"Ungültige Topics: {', '.join(invalid)}")
+        if ALL_TOPICS not in topics:
+            self._remove_topics(websocket, [ALL_TOPICS])
+        self._add_topics(websocket, topics)
+        return self.get_subscriptions(websocket)
+
+    def unsubscribe(self, websocket: WebSocket, topics: List[str]) -> List[str]:
+        """
+        Beendet Abonnements für eine Verbindung
+        """
+        self._remove_topics(websocket, topics)
+        return self.get_subscriptions(websocket)
+
+    def get_subscriptions(self, websocket: WebSocket) -> List[str]:
+        return sorted(self._socket_topics.get(websocket, ()))
+
+    def _subscribers(self, topics: Iterable[str]) -> Set[WebSocket]:
+        """Ermittelt alle Verbindungen, die mindestens eines der Topics abonniert haben"""
+        recipients = set(self._topic_index.get(ALL_TOPICS, ()))
+        for topic in topics:
+            recipients.update(self._topic_index.get(topic, ()))
+        return recipients
+
+    async def send_message(self, message: dict, client_id: str = None, topics: List[str] = None):
         """
-        Sendet eine Nachricht an einen bestimmten Client oder an alle Clients
+        Sendet eine Nachricht an einen bestimmten Client, an die Abonnenten der Topics oder an alle Clients
         """
+        # Einmal serialisieren und nur einreihen: langsame Clients bremsen weder den Aufrufer noch andere Clients
+        text = encode_message(message)
+        key = coalesce_key(message)
+        self._deliver_local(text, key, client_id, topics)
+
+        if self._backend is not None:
+            await self._backend.publish({
+                "origin": self.node_id,
+                "client_id": client_id,
+                "topics": topics,
+                "key": key,
+                "text": text
+            })
+
+    def _deliver_local(self, text: str, key, client_id: Optional[str], topics: Optional[List[str]]):
+        """Reiht eine serialisierte Nachricht für die Empfänger dieses Prozesses ein"""
         if client_id:
-            if client_id in self.active_connections:
-                for connection in self.active_connections[client_id]:
-                    try:
-                        await connection.send_json(message)
-                    except Exception as e:
-                        logger.error(f"Error sending message to client {client_id}: {e}")
+            recipients = list(self.active_connections.get(client_id, ()))
+        elif topics is not None:
+            recipients = self._subscribers(topics)
         else:
-            for client_connections in self.active_connections.values():
-                for connection in client_connections:
-                    try:
-                        await connection.send_json(message)
-                    except Exception as e:
-                        logger.error(f"Error broadcasting message: {e}")
+            recipients = list(self._socket_clients)
+
+        for websocket in recipients:
+            queue = self._queues.get(websocket)
+            if queue is not None:
+                queue.put(text, key)
+
+    async def send_to_socket(self, websocket: WebSocket, message: dict):
+        """
+        Sendet eine Nachricht an genau eine Verbindung über deren Warteschlange
+        """
+        queue = self._queues.get(websocket)
+        if queue is not None:
+            queue.put(encode_message(message), coalesce_key(message))
+
+    def get_client_stats(self) -> Dict[str, List[dict]]:
+        """
+        Gibt Queue-Tiefe und Verwerfungen je Client zurück
+        """
+        stats: Dict[str, List[dict]] = {}
+        for websocket, queue in self._queues.items():
+            client_id = self._socket_clients.get(websocket)
+            stats.setdefault(client_id, []).append(queue.get_stats())
+        return stats
+
+    def _evict(self, websocket: WebSocket):
+        """Trennt eine langsame oder tote Verbindung"""
+        client_id = self._socket_clients.get(websocket)
+        if client_id is None:
+            return
+        logger.warning(f"Client {client_id} reagiert nicht und wird getrennt")
+        self.disconnect(websocket, client_id)
+        asyncio.create_task(close_quietly(websocket, self.send_timeout))
 
-    async def broadcast_installation_progress(self, step: str, progress: float, message: str, client_id: str = None):
+    async def broadcast_installation_progress(self, step: str, progress: float, message: str, client_id: str = None,
+                                              job_id: str = None, stream: str = None):
         """
         Sendet Installations-Fortschritt an Clients
         """
@@ -51,10 +221,15 @@ class ConnectionManager:
             "data": {
                 "step": step,
                 "progress": progress,
-                "message": message
+                "message": message,
+                "job_id": job_id,
+                "stream": stream
             }
         }
-        await self.send_message(message, client_id)
+        topics = [type_topic("installation_progress")]
+        if job_id:
+            topics.append(job_topic(job_id))
+        await self.send_message(message, client_id, topics)
 
     async def broadcast_printer_status(self, printer_id: str, status: dict, client_id: str = None):
         """
@@ -67,9 +242,9 @@ class ConnectionManager:
                 "status": status
             }
         }
-        await self.send_message(message, client_id)
+        await self.send_message(message, client_id, [type_topic("printer_status"), printer_topic(printer_id)])
 
-    async def broadcast_error(self, error_message: str, details: str = None, client_id: str = None):
+    async def broadcast_error(self, error_message: str, details: str = None, client_id: str = None, job_id: str = None):
         """
         Sendet Fehlermeldungen an Clients
         """
@@ -80,6 +255,10 @@ class ConnectionManager:
                 "details": details
             }
         }
-        await self.send_message(message, client_id)
+        topics = [type_topic("error")]
+        if job_id:
+            message["data"]["job_id"] = job_id
+            topics.append(job_topic(job_id))
+        await self.send_message(message, client_id, topics)
 
 manager = ConnectionManager()
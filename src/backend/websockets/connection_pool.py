@@ -1,72 +1,102 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from fastapi import WebSocket
+import asyncio
 import logging
-import json
 from datetime import datetime
+from .broadcast import SEND_TIMEOUT, encode_message, close_quietly
+from .client_queue import ClientSendQueue, POLICY_COALESCE, coalesce_key
 
 logger = logging.getLogger(__name__)
 
 class ConnectionPool:
-    def __init__(self):
+    def __init__(self, send_timeout: float = SEND_TIMEOUT, queue_size: int = 256, queue_policy: str = POLICY_COALESCE):
         self._connections: Dict[str, WebSocket] = {}
+        self._queues: Dict[str, ClientSendQueue] = {}
+        self._send_timeout = send_timeout
+        self._queue_size = queue_size
+        self._queue_policy = queue_policy
         self._message_count = 0
+        self._evicted_count = 0
         self._last_activity = datetime.now()
 
     def add_connection(self, client_id: str, websocket: WebSocket) -> None:
         """Fügt eine neue Verbindung zum Pool hinzu"""
+        if client_id in self._connections:
+            self.remove_connection(client_id)
         self._connections[client_id] = websocket
+        self._queues[client_id] = ClientSendQueue(
+            websocket,
+            maxsize=self._queue_size,
+            policy=self._queue_policy,
+            send_timeout=self._send_timeout,
+            on_failure=lambda _: self._evict(client_id)
+        )
         self._last_activity = datetime.now()
 
     def remove_connection(self, client_id: str) -> None:
         """Entfernt eine Verbindung aus dem Pool"""
         if client_id in self._connections:
             del self._connections[client_id]
+            self._queues.pop(client_id).close()
             self._last_activity = datetime.now()
 
+    def client_ids(self) -> List[str]:
+        """Gibt die IDs aller verbundenen Clients zurück"""
+        return list(self._connections)
+
     def get_connection(self, client_id: str) -> Optional[WebSocket]:
         """Gibt die WebSocket-Verbindung für einen Client zurück"""
         return self._connections.get(client_id)
 
+    def enqueue(self, client_id: str, text: str, key=None) -> bool:
+        """Reiht einen bereits serialisierten Text für einen Client ein"""
+        queue = self._queues.get(client_id)
+        if queue is None:
+            return False
+        queue.put(text, key)
+        self._message_count += 1
+        self._last_activity = datetime.now()
+        return True
+
     async def send_to_client(self, client_id: str, message: dict) -> bool:
         """Sendet eine Nachricht an einen spezifischen Client"""
-        if client_id in self._connections:
-            try:
-                await self._connections[client_id].send_json(message)
-                self._message_count += 1
-                self._last_activity = datetime.now()
-                return True
-            except Exception as e:
-                logger.error(f"Error sending message to client {client_id}: {str(e)}")
-                self.remove_connection(client_id)
-        return False
+        return self.enqueue(client_id, encode_message(message), coalesce_key(message))
 
     async def broadcast(self, message: dict) -> None:
         """Sendet eine Nachricht an alle Clients im Pool"""
-        disconnected_clients = []
-        
-        for client_id, websocket in self._connections.items():
-            try:
-                await websocket.send_json(message)
-                self._message_count += 1
-            except Exception as e:
-                logger.error(f"Error broadcasting to client {client_id}: {str(e)}")
-                disconnected_clients.append(client_id)
+        if not self._connections:
+            return
 
-        # Entferne getrennte Verbindungen
-        for client_id in disconnected_clients:
-            self.remove_connection(client_id)
+        # Einmal serialisieren und in die Warteschlangen der Clients einreihen
+        text = encode_message(message)
+        key = coalesce_key(message)
+        for client_id in list(self._queues):
+            self.enqueue(client_id, text, key)
 
-        if len(disconnected_clients) > 0:
-            self._last_activity = datetime.now()
+    def _evict(self, client_id: str) -> None:
+        """Entfernt einen Client und schließt dessen Verbindung im Hintergrund"""
+        websocket = self._connections.get(client_id)
+        if websocket is None:
+            return
+        logger.error(f"Client {client_id} reagiert nicht und wird aus dem Pool entfernt")
+        self.remove_connection(client_id)
+        self._evicted_count += 1
+        asyncio.create_task(close_quietly(websocket, self._send_timeout))
 
     def is_empty(self) -> bool:
         """Prüft, ob der Pool leer ist"""
         return len(self._connections) == 0
 
+    def get_client_stats(self) -> Dict[str, dict]:
+        """Gibt Queue-Tiefe und Verwerfungen je Client zurück"""
+        return {client_id: queue.get_stats() for client_id, queue in self._queues.items()}
+
     def get_stats(self) -> dict:
         """Gibt Statistiken für den Pool zurück"""
         return {
             "connected_clients": len(self._connections),
             "message_count": self._message_count,
+            "evicted_count": self._evicted_count,
+            "dropped_count": sum(queue.get_stats()["dropped"] for queue in self._queues.values()),
             "last_activity": self._last_activity.isoformat()
         }
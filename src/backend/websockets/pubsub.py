@@ -0,0 +1,251 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+import os
+import json
+import socket
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Handler für eingehende Nachrichten anderer Worker
+MessageHandler = Callable[[dict], Awaitable[None]]
+
+DEFAULT_CHANNEL = "klipper-installer:websocket"
+
+
+class PubSubBackend:
+    """Basisklasse für die Verteilung von WebSocket-Nachrichten zwischen Worker-Prozessen"""
+
+    def __init__(self, channel: str = DEFAULT_CHANNEL):
+        self.channel = channel
+        self._handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler):
+        """Startet den Empfang; handler wird für jede eingehende Nachricht aufgerufen"""
+        self._handler = handler
+
+    async def stop(self):
+        """Beendet den Empfang"""
+        self._handler = None
+
+    async def publish(self, message: dict):
+        """Veröffentlicht eine Nachricht an alle Worker"""
+        raise NotImplementedError
+
+    async def _deliver(self, payload: bytes):
+        if self._handler is None:
+            return
+        try:
+            await self._handler(json.loads(payload))
+        except Exception as e:
+            logger.error(f"Fehler beim Verarbeiten einer Pub/Sub-Nachricht: {e}")
+
+
+class InProcessBackend(PubSubBackend):
+    """Verteilt Nachrichten zwischen allen Backends desselben Prozesses (Einzel-Worker-Betrieb, Tests)"""
+
+    _subscribers: Dict[str, List["InProcessBackend"]] = {}
+
+    async def start(self, handler: MessageHandler):
+        await super().start(handler)
+        self._subscribers.setdefault(self.channel, []).append(self)
+
+    async def stop(self):
+        subscribers = self._subscribers.get(self.channel, [])
+        if self in subscribers:
+            subscribers.remove(self)
+        await super().stop()
+
+    async def publish(self, message: dict):
+        # Innerhalb eines Prozesses ist keine Serialisierung nötig
+        for subscriber in list(self._subscribers.get(self.channel, [])):
+            if subscriber is not self and subscriber._handler is not None:
+                await subscriber._handler(message)
+
+
+class UnixSocketBackend(PubSubBackend):
+    """Verteilt Nachrichten über Unix-Datagramm-Sockets in einem gemeinsamen Verzeichnis
+
+    Jeder Worker bindet einen eigenen Socket; veröffentlicht wird an alle Sockets im Verzeichnis.
+    """
+
+    def __init__(self, socket_dir: str, channel: str = DEFAULT_CHANNEL):
+        super().__init__(channel)
+        self.socket_dir = socket_dir
+        self.socket_path = os.path.join(socket_dir, f"{os.getpid()}-{id(self):x}.sock")
+        self._sock: Optional[socket.socket] = None
+
+    async def start(self, handler: MessageHandler):
+        await super().start(handler)
+        os.makedirs(self.socket_dir, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.socket_path)
+        self._sock.setblocking(False)
+        asyncio.get_running_loop().add_reader(self._sock.fileno(), self._on_readable)
+
+    async def stop(self):
+        if self._sock is not None:
+            asyncio.get_running_loop().remove_reader(self._sock.fileno())
+            self._sock.close()
+            self._sock = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        await super().stop()
+
+    def _on_readable(self):
+        while True:
+            try:
+                payload = self._sock.recv(1024 * 1024)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.error(f"Fehler beim Empfangen über {self.socket_path}: {e}")
+                return
+            asyncio.ensure_future(self._deliver(payload))
+
+    async def publish(self, message: dict):
+        if self._sock is None:
+            return
+        payload = json.dumps(message).encode()
+        for name in os.listdir(self.socket_dir):
+            if not name.endswith(".sock"):
+                continue
+            peer = os.path.join(self.socket_dir, name)
+            if peer == self.socket_path:
+                continue
+            try:
+                self._sock.sendto(payload, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket eines beendeten Workers
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                logger.warning(f"Pub/Sub-Empfänger {peer} ist überlastet, Nachricht verworfen")
+            except OSError as e:
+                logger.error(f"Fehler beim Senden an {peer}: {e}")
+
+
+class RedisBackend(PubSubBackend):
+    """Verteilt Nachrichten über PUBLISH/SUBSCRIBE eines Redis-kompatiblen Servers (RESP-Protokoll)"""
+
+    def __init__(self, url: str, channel: str = DEFAULT_CHANNEL):
+        super().__init__(channel)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self._subscriber: Optional[asyncio.Task] = None
+        self._publisher: Optional[tuple] = None
+        self._publish_lock = asyncio.Lock()
+
+    async def start(self, handler: MessageHandler):
+        await super().start(handler)
+        self._subscriber = asyncio.create_task(self._subscribe_loop())
+
+    async def stop(self):
+        if self._subscriber is not None:
+            self._subscriber.cancel()
+            try:
+                await self._subscriber
+            except asyncio.CancelledError:
+                pass
+            self._subscriber = None
+        if self._publisher is not None:
+            self._publisher[1].close()
+            self._publisher = None
+        await super().stop()
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            writer.write(self._encode_command("AUTH", self.password))
+            await writer.drain()
+            await self._read_reply(reader)
+        return reader, writer
+
+    @staticmethod
+    def _encode_command(*args) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        return b"".join(parts)
+
+    @classmethod
+    async def _read_reply(cls, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Verbindung zum Pub/Sub-Server geschlossen")
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b"+":
+            return body.decode()
+        if prefix == b"-":
+            raise ConnectionError(body.decode())
+        if prefix == b":":
+            return int(body)
+        if prefix == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = await reader.readexactly(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            return [await cls._read_reply(reader) for _ in range(int(body))]
+        raise ConnectionError(f"Unbekannte Antwort: {line!r}")
+
+    async def _subscribe_loop(self):
+        """Hält das Abonnement aufrecht und verbindet sich bei Fehlern neu"""
+        delay = 1
+        while True:
+            writer = None
+            try:
+                reader, writer = await self._connect()
+                writer.write(self._encode_command("SUBSCRIBE", self.channel))
+                await writer.drain()
+                delay = 1
+                while True:
+                    reply = await self._read_reply(reader)
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        await self._deliver(reply[2])
+            except asyncio.CancelledError:
+                raise
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                logger.warning(f"Pub/Sub-Verbindung zu {self.host}:{self.port} unterbrochen: {e}")
+            finally:
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    async def publish(self, message: dict):
+        payload = json.dumps(message).encode()
+        async with self._publish_lock:
+            try:
+                if self._publisher is None:
+                    self._publisher = await self._connect()
+                reader, writer = self._publisher
+                writer.write(self._encode_command("PUBLISH", self.channel, payload))
+                await writer.drain()
+                await self._read_reply(reader)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                logger.error(f"Fehler beim Veröffentlichen über {self.host}:{self.port}: {e}")
+                if self._publisher is not None:
+                    self._publisher[1].close()
+                self._publisher = None
+
+
+def create_backend(url: Optional[str]) -> PubSubBackend:
+    """Erzeugt das Backend zu einer URL (memory://, unix:///pfad, redis://host:port)"""
+    if not url or url.startswith("memory://"):
+        return InProcessBackend()
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        return UnixSocketBackend(parsed.path)
+    if parsed.scheme == "redis":
+        return RedisBackend(url)
+    raise ValueError(f"Unbekanntes Pub/Sub-Backend: {url}")
@@ -1,28 +1,56 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from fastapi import WebSocket
 import logging
 import asyncio
-import json
-from datetime import datetime
 from .connection_pool import ConnectionPool
+from .broadcast import encode_message
+from .client_queue import coalesce_key
 
 logger = logging.getLogger(__name__)
 
+# Eintrag der Warteschlange: (pool_id, client_id oder None für Broadcast, Coalesce-Schlüssel, serialisierte Nachricht)
+QueuedMessage = Tuple[str, Optional[str], Optional[tuple], str]
+
 class WebSocketManager:
-    def __init__(self):
+    def __init__(self, max_batch_messages: int = 50, max_batch_bytes: int = 64 * 1024,
+                 flush_interval: float = 0.02, max_queue_size: int = 10000):
         self._pools: Dict[str, ConnectionPool] = {}
-        self._message_queue: asyncio.Queue = asyncio.Queue()
-        self._batch_size = 10
-        self._batch_timeout = 0.1  # 100ms
-        asyncio.create_task(self._process_message_queue())
+        self._message_queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._max_batch_messages = max_batch_messages
+        self._max_batch_bytes = max_batch_bytes
+        self._flush_interval = flush_interval
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._stats = {"messages": 0, "deliveries": 0, "frames": 0, "batches": 0, "dropped": 0}
+
+    async def start(self):
+        """Startet den Dispatcher; wird aus dem FastAPI-Startup-Hook aufgerufen"""
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._process_message_queue())
+            logger.info("WebSocket-Dispatcher gestartet")
+
+    async def stop(self):
+        """Stoppt den Dispatcher und stellt noch wartende Nachrichten zu"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        messages = []
+        while not self._message_queue.empty():
+            messages.append(self._message_queue.get_nowait())
+        if messages:
+            self._dispatch(messages)
+        logger.info("WebSocket-Dispatcher gestoppt")
 
     async def connect(self, websocket: WebSocket, client_id: str, pool_id: str = "default"):
         """Verbindet einen WebSocket-Client"""
         await websocket.accept()
-        
+
         if pool_id not in self._pools:
             self._pools[pool_id] = ConnectionPool()
-        
+
         self._pools[pool_id].add_connection(client_id, websocket)
         logger.info(f"Client {client_id} connected to pool {pool_id}")
 
@@ -34,61 +62,104 @@ class WebSocketManager:
                 del self._pools[pool_id]
         logger.info(f"Client {client_id} disconnected from pool {pool_id}")
 
+    def _enqueue(self, pool_id: str, client_id: Optional[str], message: dict):
+        """Serialisiert eine Nachricht einmalig und reiht sie ein; bei voller Queue wird sie verworfen"""
+        try:
+            self._message_queue.put_nowait((pool_id, client_id, coalesce_key(message), encode_message(message)))
+        except asyncio.QueueFull:
+            self._stats["dropped"] += 1
+
     async def broadcast(self, message: dict, pool_id: str = "default"):
         """Sendet eine Nachricht an alle Clients in einem Pool"""
-        await self._message_queue.put((pool_id, None, message))
+        self._enqueue(pool_id, None, message)
 
     async def send_to_client(self, client_id: str, message: dict, pool_id: str = "default"):
         """Sendet eine Nachricht an einen bestimmten Client"""
-        await self._message_queue.put((pool_id, client_id, message))
+        self._enqueue(pool_id, client_id, message)
 
     async def _process_message_queue(self):
-        """Verarbeitet die Nachrichten-Warteschlange in Batches"""
+        """Sammelt Nachrichten, bis die Batch-Größe oder die Deadline erreicht ist, und versendet sie"""
+        loop = asyncio.get_running_loop()
         while True:
-            messages = []
             try:
-                # Sammle Nachrichten für den aktuellen Batch
-                while len(messages) < self._batch_size:
-                    try:
-                        message = await asyncio.wait_for(
-                            self._message_queue.get(),
-                            timeout=self._batch_timeout
-                        )
-                        messages.append(message)
-                    except asyncio.TimeoutError:
-                        break
-
-                if not messages:
-                    continue
-
-                # Gruppiere Nachrichten nach Pool
-                pool_messages: Dict[str, List] = {}
-                for pool_id, client_id, message in messages:
-                    if pool_id not in pool_messages:
-                        pool_messages[pool_id] = []
-                    pool_messages[pool_id].append((client_id, message))
-
-                # Sende Nachrichten für jeden Pool
-                for pool_id, pool_msgs in pool_messages.items():
-                    if pool_id in self._pools:
-                        pool = self._pools[pool_id]
-                        for client_id, message in pool_msgs:
-                            if client_id:
-                                # Sende an spezifischen Client
-                                await pool.send_to_client(client_id, message)
-                            else:
-                                # Broadcast an alle Clients im Pool
-                                await pool.broadcast(message)
+                messages = [await self._message_queue.get()]
+                size = 0
+                deadline = loop.time() + self._flush_interval
+                while len(messages) < self._max_batch_messages and size < self._max_batch_bytes:
+                    # Bei Lastspitzen liegt der Rest bereits in der Queue, sonst bis zur Deadline warten
+                    if self._message_queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(self._message_queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        item = self._message_queue.get_nowait()
+                    messages.append(item)
+                    size += len(item[3])
 
+                self._dispatch(messages)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Error processing message queue: {str(e)}")
                 await asyncio.sleep(1)  # Verhindere CPU-Überlastung bei Fehlern
 
+    def _dispatch(self, messages: List[QueuedMessage]):
+        """Packt die Nachrichten je Client in einen einzigen Frame und reiht ihn ein"""
+        per_client: Dict[Tuple[str, str], List[Tuple[Optional[tuple], str]]] = {}
+        for pool_id, client_id, key, text in messages:
+            pool = self._pools.get(pool_id)
+            if pool is None:
+                continue
+            recipients = [client_id] if client_id else pool.client_ids()
+            for recipient in recipients:
+                per_client.setdefault((pool_id, recipient), []).append((key, text))
+        self._stats["messages"] += len(messages)
+
+        for (pool_id, client_id), entries in per_client.items():
+            frame, key = self._build_frame(entries)
+            if self._pools[pool_id].enqueue(client_id, frame, key):
+                self._stats["frames"] += 1
+                self._stats["deliveries"] += len(entries)
+                if len(entries) > 1:
+                    self._stats["batches"] += 1
+
+    @staticmethod
+    def _build_frame(entries: List[Tuple[Optional[tuple], str]]) -> Tuple[str, Optional[tuple]]:
+        """Erzeugt einen Einzel- oder Batch-Frame ({"type": "batch", "data": [...]})"""
+        # Innerhalb eines Batches zählt je Drucker nur der letzte Status
+        seen = set()
+        texts = []
+        for key, text in reversed(entries):
+            if key is not None:
+                if key in seen:
+                    continue
+                seen.add(key)
+            texts.append(text)
+        texts.reverse()
+        if len(entries) == 1:
+            # Einzelne Nachrichten bleiben in der Client-Queue weiterhin zusammenfassbar
+            return entries[0][1], entries[0][0]
+        return '{"type":"batch","data":[' + ",".join(texts) + "]}", None
+
     def get_pool_stats(self, pool_id: str = "default") -> dict:
         """Gibt Statistiken für einen Pool zurück"""
         if pool_id in self._pools:
             return self._pools[pool_id].get_stats()
         return {"connected_clients": 0, "message_count": 0}
 
+    def get_stats(self) -> dict:
+        """Gibt Statistiken des Dispatchers zurück"""
+        frames = self._stats["frames"]
+        return {
+            **self._stats,
+            "queue_depth": self._message_queue.qsize(),
+            "running": self._dispatcher is not None and not self._dispatcher.done(),
+            "messages_per_frame": round(self._stats["deliveries"] / frames, 2) if frames else 0.0
+        }
+
 # Globale WebSocket-Manager-Instanz
 websocket_manager = WebSocketManager()
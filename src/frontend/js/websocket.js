@@ -111,6 +111,11 @@ export class WebSocketClient {
         })
         break
 
+      case 'batch':
+        // Der Server fasst mehrere Nachrichten in einem Frame zusammen
+        message.data.forEach(entry => this._handleMessage(entry))
+        break
+
       case 'pong':
         // Handle pong response if needed
         break
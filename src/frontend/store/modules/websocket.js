@@ -40,8 +40,13 @@ export default {
   },
 
   actions: {
-    handleWebSocketMessage({ commit }, message) {
+    handleWebSocketMessage({ commit, dispatch }, message) {
       switch (message.type) {
+        case 'batch':
+          // Der Server fasst mehrere Nachrichten in einem Frame zusammen
+          message.data.forEach(entry => dispatch('handleWebSocketMessage', entry))
+          break
+
         case 'installation_progress':
           commit('setInstallationProgress', message.data)
           break
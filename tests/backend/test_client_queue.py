@@ -0,0 +1,73 @@
+import json
+import pytest
+import asyncio
+from src.backend.websockets.client_queue import ClientSendQueue, coalesce_key
+from src.backend.websockets.broadcast import encode_message
+
+class BlockedWebSocket:
+    """WebSocket-Attrappe, die erst nach Freigabe sendet"""
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+
+    async def send_text(self, text):
+        await self.release.wait()
+        self.sent.append(json.loads(text))
+
+def _status(printer_id, state):
+    return {"type": "printer_status", "data": {"printer_id": printer_id, "status": {"state": state}}}
+
+def _put(queue, message):
+    queue.put(encode_message(message), coalesce_key(message))
+
+@pytest.mark.asyncio
+async def test_coalesce_keeps_latest_status_per_printer():
+    """Test ob pro Drucker nur der letzte Status in der Queue wartet"""
+    websocket = BlockedWebSocket()
+    queue = ClientSendQueue(websocket, policy="coalesce")
+    await asyncio.sleep(0)
+
+    for state in ("heating", "printing", "paused"):
+        _put(queue, _status("1", state))
+    _put(queue, _status("2", "ready"))
+
+    assert queue.get_stats()["depth"] == 2
+    assert queue.get_stats()["coalesced"] == 2
+
+    websocket.release.set()
+    await asyncio.sleep(0.01)
+    assert [m["data"]["status"]["state"] for m in websocket.sent] == ["paused", "ready"]
+    queue.close()
+
+@pytest.mark.asyncio
+async def test_drop_oldest_bounds_queue():
+    """Test ob bei voller Queue die ältesten Nachrichten verworfen werden"""
+    websocket = BlockedWebSocket()
+    queue = ClientSendQueue(websocket, maxsize=3, policy="drop_oldest")
+    await asyncio.sleep(0)
+
+    for i in range(10):
+        _put(queue, {"type": "installation_progress", "data": {"message": str(i)}})
+
+    stats = queue.get_stats()
+    assert stats["depth"] == 3
+    assert stats["dropped"] == 7
+
+    websocket.release.set()
+    await asyncio.sleep(0.01)
+    assert [m["data"]["message"] for m in websocket.sent] == ["7", "8", "9"]
+    queue.close()
+
+@pytest.mark.asyncio
+async def test_failed_send_reports_client():
+    """Test ob ein fehlgeschlagener Versand den Client meldet"""
+    class BrokenWebSocket:
+        async def send_text(self, text):
+            raise RuntimeError("Verbindung getrennt")
+
+    failed = []
+    queue = ClientSendQueue(BrokenWebSocket(), on_failure=failed.append)
+    _put(queue, _status("1", "ready"))
+    await asyncio.sleep(0.01)
+
+    assert len(failed) == 1
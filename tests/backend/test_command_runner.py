@@ -0,0 +1,47 @@
+import pytest
+from src.backend.services.command_runner import run_streaming, set_output_handler, reset_output_handler
+
+@pytest.mark.asyncio
+async def test_lines_are_streamed_in_order():
+    """Test ob Ausgabezeilen einzeln und in Reihenfolge an den Handler gehen"""
+    received = []
+
+    async def handler(stream, line):
+        received.append((stream, line))
+
+    result = await run_streaming("printf 'eins\\nzwei\\rdrei'", on_output=handler)
+
+    assert result.returncode == 0
+    assert received == [("stdout", "eins"), ("stdout", "zwei"), ("stdout", "drei")]
+
+@pytest.mark.asyncio
+async def test_only_tail_is_kept():
+    """Test ob bei großer Ausgabe nur die letzten Zeilen gepuffert werden"""
+    result = await run_streaming("seq 1 20000", tail_lines=10)
+
+    assert result.line_count == 20000
+    assert result.stdout.splitlines() == [str(i) for i in range(19991, 20001)]
+
+@pytest.mark.asyncio
+async def test_failed_command_keeps_stderr():
+    """Test ob Rückgabecode und stderr eines fehlgeschlagenen Befehls erhalten bleiben"""
+    result = await run_streaming("echo kaputt >&2; exit 3")
+
+    assert result.returncode == 3
+    assert result.stderr == "kaputt"
+
+@pytest.mark.asyncio
+async def test_context_handler_is_used():
+    """Test ob der im Task gesetzte Handler ohne explizite Übergabe greift"""
+    received = []
+
+    async def handler(stream, line):
+        received.append(line)
+
+    token = set_output_handler(handler)
+    try:
+        await run_streaming("echo hallo")
+    finally:
+        reset_output_handler(token)
+
+    assert received == ["hallo"]
@@ -0,0 +1,108 @@
+import json
+import pytest
+import asyncio
+from src.backend.websockets.connection_manager import ConnectionManager
+
+class FakeWebSocket:
+    """WebSocket-Attrappe, die gesendete Nachrichten sammelt"""
+    def __init__(self, delay: float = 0):
+        self.sent = []
+        self.delay = delay
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        self.closed = True
+
+async def _drain():
+    """Lässt die Writer-Tasks der Sendewarteschlangen laufen"""
+    await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_unsubscribed_clients_receive_everything():
+    """Test ob Verbindungen ohne Abonnement weiterhin alle Nachrichten erhalten"""
+    manager = ConnectionManager()
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "dashboard")
+
+    await manager.broadcast_printer_status("1", {"state": "ready"})
+    await _drain()
+
+    assert len(websocket.sent) == 1
+
+@pytest.mark.asyncio
+async def test_printer_status_only_reaches_subscribers():
+    """Test ob Drucker-Updates nur an Abonnenten des Druckers gehen"""
+    manager = ConnectionManager()
+    printer_one, printer_two = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(printer_one, "a")
+    await manager.connect(printer_two, "b")
+    manager.subscribe(printer_one, ["printer:1"])
+    manager.subscribe(printer_two, ["printer:2"])
+
+    await manager.broadcast_printer_status("1", {"state": "ready"})
+    await _drain()
+
+    assert [m["data"]["printer_id"] for m in printer_one.sent] == ["1"]
+    assert printer_two.sent == []
+
+@pytest.mark.asyncio
+async def test_job_and_type_topics():
+    """Test ob Job- und Nachrichtentyp-Topics ausgewertet werden"""
+    manager = ConnectionManager()
+    job_socket, error_socket = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(job_socket, "a")
+    await manager.connect(error_socket, "b")
+    manager.subscribe(job_socket, ["job:42"])
+    manager.subscribe(error_socket, ["type:error"])
+
+    await manager.broadcast_installation_progress("make", 0.5, "CC src/sched.c", job_id="42")
+    await manager.broadcast_installation_progress("make", 0.5, "CC src/sched.c", job_id="43")
+    await manager.broadcast_error("Fehler")
+    await _drain()
+
+    assert len(job_socket.sent) == 1
+    assert [m["type"] for m in error_socket.sent] == ["error"]
+
+@pytest.mark.asyncio
+async def test_disconnect_cleans_topic_index():
+    """Test ob getrennte Verbindungen aus dem Topic-Index entfernt werden"""
+    manager = ConnectionManager()
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "a")
+    manager.subscribe(websocket, ["printer:1"])
+
+    manager.disconnect(websocket, "a")
+    await manager.broadcast_printer_status("1", {})
+    await _drain()
+
+    assert websocket.sent == []
+    assert manager._topic_index == {}
+
+def test_invalid_topic_is_rejected():
+    """Test ob unbekannte Topic-Formate abgelehnt werden"""
+    manager = ConnectionManager()
+
+    with pytest.raises(ValueError):
+        manager.subscribe(FakeWebSocket(), ["unknown"])
+
+@pytest.mark.asyncio
+async def test_slow_client_is_evicted_without_blocking_others():
+    """Test ob ein hängender Client getrennt wird, ohne andere Clients aufzuhalten"""
+    manager = ConnectionManager(send_timeout=0.05)
+    fast, slow = FakeWebSocket(), FakeWebSocket(delay=10)
+    await manager.connect(fast, "fast")
+    await manager.connect(slow, "slow")
+
+    await asyncio.wait_for(manager.broadcast_printer_status("1", {}), timeout=1)
+    await asyncio.sleep(0.2)
+
+    assert len(fast.sent) == 1
+    assert "slow" not in manager.active_connections
+    assert slow.closed
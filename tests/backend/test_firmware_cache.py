@@ -0,0 +1,54 @@
+from src.backend.services.firmware_cache import FirmwareCache
+
+def _write_build(out_dir, content: bytes):
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / "klipper.elf.hex").write_bytes(content)
+
+def test_store_and_restore(tmp_path):
+    """Test ob gespeicherte Artefakte bei gleichem Schlüssel wiederhergestellt werden"""
+    cache = FirmwareCache(str(tmp_path / "cache"))
+    key = cache.make_key("CONFIG_MACH_AVR=y\n", "abc123")
+    _write_build(tmp_path / "build", b":00000001FF")
+
+    assert cache.restore(key, str(tmp_path / "target")) is False
+    assert cache.store(key, str(tmp_path / "build")) is True
+    assert cache.restore(key, str(tmp_path / "target")) is True
+    assert (tmp_path / "target" / "klipper.elf.hex").read_bytes() == b":00000001FF"
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+def test_key_depends_on_config_and_commit():
+    """Test ob Konfiguration und Klipper-Commit in den Schlüssel einfließen"""
+    key = FirmwareCache.make_key("CONFIG_MACH_AVR=y\n", "abc123")
+
+    assert key == FirmwareCache.make_key("CONFIG_MACH_AVR=y\n", "abc123")
+    assert key != FirmwareCache.make_key("CONFIG_MACH_STM32=y\n", "abc123")
+    assert key != FirmwareCache.make_key("CONFIG_MACH_AVR=y\n", "def456")
+
+def test_lru_eviction(tmp_path):
+    """Test ob bei Überschreitung der Größe der am längsten ungenutzte Eintrag entfernt wird"""
+    cache = FirmwareCache(str(tmp_path / "cache"), max_size_bytes=250)
+    for name in ("a", "b"):
+        _write_build(tmp_path / name, b"x" * 100)
+        cache.store(name, str(tmp_path / name))
+
+    # "a" wird genutzt, damit "b" der älteste Eintrag ist
+    cache.restore("a", str(tmp_path / "target"))
+    _write_build(tmp_path / "c", b"x" * 100)
+    cache.store("c", str(tmp_path / "c"))
+
+    keys = {entry["key"] for entry in cache.list_entries()}
+    assert keys == {"a", "c"}
+    assert cache.get_stats()["evictions"] == 1
+
+def test_index_survives_restart(tmp_path):
+    """Test ob der Cache-Index nach einem Neustart erhalten bleibt"""
+    cache = FirmwareCache(str(tmp_path / "cache"))
+    _write_build(tmp_path / "build", b"data")
+    cache.store("key", str(tmp_path / "build"))
+
+    reloaded = FirmwareCache(str(tmp_path / "cache"))
+    assert reloaded.restore("key", str(tmp_path / "target")) is True
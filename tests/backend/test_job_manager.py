@@ -0,0 +1,66 @@
+import json
+import pytest
+import asyncio
+from src.backend.services.job_manager import JobManager
+
+async def _wait_for_job(manager, job_id):
+    while manager.get_job(job_id)["status"] in ("pending", "running"):
+        await asyncio.sleep(0.01)
+    return manager.get_job(job_id)
+
+@pytest.mark.asyncio
+async def test_submit_returns_immediately(tmp_path):
+    """Test ob submit sofort eine Job-ID liefert, bevor die Schritte laufen"""
+    manager = JobManager(jobs_file=str(tmp_path / "jobs.json"))
+    started = asyncio.Event()
+
+    async def slow_step():
+        started.set()
+        await asyncio.sleep(0.05)
+        return {"status": "success", "message": "ok"}
+
+    job = manager.submit("install", [("slow", slow_step)], printer_id="1")
+
+    assert job["status"] == "pending"
+    assert not started.is_set()
+
+    job = await _wait_for_job(manager, job["id"])
+    assert job["status"] == "success"
+    assert job["steps"][0]["duration"] >= 0.05
+    assert job["result"] == {"status": "success", "message": "ok"}
+
+@pytest.mark.asyncio
+async def test_failed_step_skips_remaining_steps(tmp_path):
+    """Test ob ein fehlgeschlagener Schritt den Job abbricht"""
+    manager = JobManager(jobs_file=str(tmp_path / "jobs.json"))
+
+    async def failing_step():
+        return {"status": "error", "message": "make fehlgeschlagen"}
+
+    async def unreachable_step():
+        raise AssertionError("darf nicht ausgeführt werden")
+
+    job = manager.submit("install", [("compile", failing_step), ("flash", unreachable_step)])
+    job = await _wait_for_job(manager, job["id"])
+
+    assert job["status"] == "error"
+    assert job["error"] == "make fehlgeschlagen"
+    assert [step["status"] for step in job["steps"]] == ["error", "skipped"]
+
+def test_running_jobs_are_interrupted_after_restart(tmp_path):
+    """Test ob laufende Jobs nach einem Neustart wiedergefunden werden"""
+    jobs_file = tmp_path / "jobs.json"
+    jobs_file.write_text(json.dumps([{
+        "id": "abc",
+        "type": "install",
+        "status": "running",
+        "created_at": "2024-01-01T00:00:00",
+        "steps": [{"name": "compile", "status": "running"}]
+    }]))
+
+    manager = JobManager(jobs_file=str(jobs_file))
+    job = manager.get_job("abc")
+
+    assert job["status"] == "interrupted"
+    assert job["steps"][0]["status"] == "interrupted"
+    assert json.loads(jobs_file.read_text())[0]["status"] == "interrupted"
@@ -0,0 +1,53 @@
+import pytest
+import asyncio
+from src.backend.services.provisioning_scheduler import ProvisioningScheduler
+
+class FakeInstaller:
+    """Installer-Attrappe, die Builds und Flash-Vorgänge nur protokolliert"""
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.builds = []
+        self.active_ports = set()
+        self.port_conflicts = 0
+
+    async def compile_firmware(self, mcu_type=None, processor=None, build_dir=None, jobs=None):
+        self.builds.append(build_dir)
+        await asyncio.sleep(0.01)
+        return {"status": "success", "message": "ok", "firmware_dir": f"{build_dir}/out"}
+
+    async def flash_firmware(self, port, mcu_type=None, firmware_dir=None):
+        if port in self.active_ports:
+            self.port_conflicts += 1
+        self.active_ports.add(port)
+        await asyncio.sleep(0.01)
+        self.active_ports.discard(port)
+        return {"status": "success", "message": "ok"}
+
+@pytest.mark.asyncio
+async def test_identical_targets_share_one_build(tmp_path):
+    """Test ob gleiche MCU-Konfigurationen nur einmal kompiliert werden"""
+    installer = FakeInstaller(str(tmp_path))
+    scheduler = ProvisioningScheduler(installer, max_parallel_builds=2)
+    targets = [{"port": f"/dev/ttyUSB{i}", "mcu_type": "atmega2560", "processor": "AVR"} for i in range(5)]
+    targets.append({"port": "/dev/ttyACM0", "mcu_type": "stm32f103", "processor": "STM32"})
+
+    result = await scheduler.provision(targets)
+
+    assert result["status"] == "success"
+    assert len(installer.builds) == 2
+    assert len(set(installer.builds)) == 2
+
+@pytest.mark.asyncio
+async def test_same_port_is_never_flashed_concurrently(tmp_path):
+    """Test ob der Port-Lock parallele Zugriffe auf ein Gerät verhindert"""
+    installer = FakeInstaller(str(tmp_path))
+    scheduler = ProvisioningScheduler(installer)
+    targets = [
+        {"port": "/dev/ttyUSB0", "mcu_type": "atmega2560", "processor": "AVR"},
+        {"port": "/dev/ttyUSB0", "mcu_type": "stm32f103", "processor": "STM32"},
+    ]
+
+    result = await scheduler.provision(targets)
+
+    assert result["status"] == "success"
+    assert installer.port_conflicts == 0
@@ -0,0 +1,80 @@
+import json
+import pytest
+import asyncio
+from src.backend.websockets.connection_manager import ConnectionManager
+from src.backend.websockets.pubsub import InProcessBackend, UnixSocketBackend, RedisBackend
+
+class FakeWebSocket:
+    """WebSocket-Attrappe, die gesendete Nachrichten sammelt"""
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+async def _start_workers(make_backend):
+    """Startet zwei ConnectionManager, die wie zwei Worker-Prozesse verbunden sind"""
+    workers = []
+    for name in ("worker-1", "worker-2"):
+        manager = ConnectionManager()
+        await manager.start_pubsub(make_backend())
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, name)
+        workers.append((manager, websocket))
+    return workers
+
+async def _assert_broadcast_reaches_all_workers(workers):
+    (first, first_socket), (second, second_socket) = workers
+    await first.broadcast_printer_status("1", {"state": "ready"})
+    await asyncio.sleep(0.1)
+
+    assert [m["type"] for m in first_socket.sent] == ["printer_status"]
+    assert [m["type"] for m in second_socket.sent] == ["printer_status"]
+
+    for manager, _ in workers:
+        await manager.stop_pubsub()
+
+@pytest.mark.asyncio
+async def test_in_process_backend():
+    """Test ob Broadcasts über das In-Process-Backend alle Manager erreichen"""
+    workers = await _start_workers(lambda: InProcessBackend(channel="test-in-process"))
+    await _assert_broadcast_reaches_all_workers(workers)
+
+@pytest.mark.asyncio
+async def test_unix_socket_backend(tmp_path):
+    """Test ob Broadcasts über Unix-Sockets alle Worker erreichen"""
+    workers = await _start_workers(lambda: UnixSocketBackend(str(tmp_path)))
+    await _assert_broadcast_reaches_all_workers(workers)
+
+@pytest.mark.asyncio
+async def test_redis_backend_with_local_stand_in():
+    """Test ob das Redis-Backend mit einem lokalen RESP-Server zusammenarbeitet"""
+    subscribers = []
+
+    async def handle(reader, writer):
+        while True:
+            try:
+                command = await RedisBackend._read_reply(reader)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                break
+            name = command[0].upper()
+            if name == b"SUBSCRIBE":
+                subscribers.append(writer)
+                writer.write(b"*3\r\n$9\r\nsubscribe\r\n" + RedisBackend._encode_command(command[1])[4:] + b":1\r\n")
+            elif name == b"PUBLISH":
+                for subscriber in subscribers:
+                    subscriber.write(RedisBackend._encode_command("message", command[1], command[2]))
+                writer.write(f":{len(subscribers)}\r\n".encode())
+            await writer.drain()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    workers = await _start_workers(lambda: RedisBackend(f"redis://127.0.0.1:{port}"))
+    while len(subscribers) < 2:
+        await asyncio.sleep(0.01)
+
+    await _assert_broadcast_reaches_all_workers(workers)
+    server.close()
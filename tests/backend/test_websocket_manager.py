@@ -0,0 +1,64 @@
+import json
+import pytest
+import asyncio
+from src.backend.websockets.websocket_manager import WebSocketManager
+
+class FakeWebSocket:
+    """WebSocket-Attrappe, die empfangene Frames sammelt"""
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.frames.append(json.loads(text))
+
+@pytest.mark.asyncio
+async def test_burst_is_sent_as_single_batch_frame():
+    """Test ob eine Nachrichtenspitze als ein Batch-Frame je Client versendet wird"""
+    manager = WebSocketManager(flush_interval=0.05)
+    await manager.start()
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "a")
+
+    for i in range(5):
+        await manager.broadcast({"type": "installation_progress", "data": {"message": str(i)}})
+    await asyncio.sleep(0.1)
+
+    assert len(websocket.frames) == 1
+    assert websocket.frames[0]["type"] == "batch"
+    assert [m["data"]["message"] for m in websocket.frames[0]["data"]] == ["0", "1", "2", "3", "4"]
+    await manager.stop()
+
+@pytest.mark.asyncio
+async def test_single_message_is_not_wrapped():
+    """Test ob einzelne Nachrichten ohne Batch-Hülle versendet werden"""
+    manager = WebSocketManager(flush_interval=0.01)
+    await manager.start()
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "a")
+
+    await manager.send_to_client("a", {"type": "pong", "data": {}})
+    await asyncio.sleep(0.05)
+
+    assert websocket.frames == [{"type": "pong", "data": {}}]
+    await manager.stop()
+
+@pytest.mark.asyncio
+async def test_batch_keeps_only_latest_printer_status():
+    """Test ob innerhalb eines Batches nur der letzte Status je Drucker übrig bleibt"""
+    manager = WebSocketManager(flush_interval=0.05)
+    await manager.start()
+    websocket = FakeWebSocket()
+    await manager.connect(websocket, "a")
+
+    for state in ("heating", "printing"):
+        await manager.broadcast({"type": "printer_status", "data": {"printer_id": "1", "status": state}})
+    await manager.broadcast({"type": "error", "data": {"message": "x"}})
+    await asyncio.sleep(0.1)
+
+    assert [m["type"] for m in websocket.frames[0]["data"]] == ["printer_status", "error"]
+    assert websocket.frames[0]["data"][0]["data"]["status"] == "printing"
+    assert manager.get_stats()["frames"] == 1
+    await manager.stop()